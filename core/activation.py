@@ -7,7 +7,7 @@ The route method must be reimplemented by concrete subclasses to provide the act
 
 from abc import ABC, abstractmethod
 from typing import List
-from core.message import Message, Reply
+from core.message import Message, MessageType, Reply
 from core.neuron import Neuron
 from core.st_memory import WorkingMemory
 
@@ -34,5 +34,13 @@ class Activation(ABC):
             List[Message]: A list of messages to be sent to the successors of the neuron.
         """
         # Default implementation, can be overridden by subclasses
-        # Create a message for each successor of the neuron
-        return [Message(type="empty", sender_id=neuron.sender_id, receiver_id=successor, reply=reply) for successor in neuron.successors]
\ No newline at end of file
+        # Create a message for each successor of the neuron, all of them sharing the same immutable reply
+        sender_id = neuron.id
+        # Use the successors cached by the brain, or the current successors of a neuron used on its own
+        successor_ids = neuron.successor_ids
+        if successor_ids is None:
+            successor_ids = neuron.successors
+        return [
+            Message(type=MessageType.PAYLOAD, sender_id=sender_id, receiver_id=successor, reply=reply)
+            for successor in successor_ids
+        ]
\ No newline at end of file
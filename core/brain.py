@@ -1,13 +1,40 @@
 import asyncio
+from collections import defaultdict, deque
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, List
 from core.neuron import Neuron
+from core.reply_cache import ReplyCache
 from core.st_memory import WorkingMemory
+import queue
+import threading
 import time
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Thread pools shared by every brain run, keyed by number of workers
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    """
+    Gets the shared thread pool executor for a given number of workers, creating it on first use.
+
+    Args:
+        workers (int): The number of worker threads.
+
+    Returns:
+        ThreadPoolExecutor: The shared executor.
+    """
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"brain-{workers}")
+            _executors[workers] = executor
+        return executor
+
 class Brain:
     def __init__(
         self, 
@@ -15,10 +42,11 @@ class Brain:
         neurons: List[Neuron], 
         max_working_memory_size: int = int(1e5),
         working_memory_overflow_strategy: str = 'fifo', 
-        workers: int = 8,
+        workers: int = None,
         timeout: int = 120,
         iteration_delay: float = 0.5,
         max_concurrent_fires: int = 100,
+        reply_cache_size: int = 1024,
     ):
         """
         Initializes the Brain instance.
@@ -28,103 +56,281 @@ class Brain:
             neurons (List[Neuron]): The list of neurons in the brain.
             max_working_memory_size (int, optional): The maximum size of the working memory. Defaults to 1e5.
             working_memory_overflow_strategy (str, optional): The strategy to use when the working memory overflows. Defaults to 'fifo'.
-            workers (int, optional): The number of worker threads. Defaults to 8.
+            workers (int, optional): The number of worker threads. Defaults to min(32, cpu_count + 4), like ThreadPoolExecutor.
             timeout (int, optional): The timeout for the brain execution. Defaults to 120.
-            iteration_delay (float, optional): The delay between iterations. Defaults to 0.5.
+            iteration_delay (float, optional): The maximum time to wait for a fire to complete before polling clock based triggers. Defaults to 0.5.
             max_concurrent_fires (int, optional): The maximum number of concurrent fires. Defaults to 100.
+            reply_cache_size (int, optional): The maximum number of replies cached for the cacheable neurons. Defaults to 1024.
         """
         self.name = name
         self.neurons = {neuron.id: neuron for neuron in neurons}
         self.max_working_memory_size = max_working_memory_size
         self.working_memory_overflow_strategy = working_memory_overflow_strategy
-        self.workers = workers
+        self.workers = workers if workers is not None else min(32, (os.cpu_count() or 1) + 4)
         self.timeout = timeout
         self.iteration_delay = iteration_delay
         self.max_concurrent_fires = max_concurrent_fires
+        self.reply_cache = ReplyCache(max_size=reply_cache_size)
         self.working_memory = WorkingMemory(max_working_memory_size=self.max_working_memory_size, working_memory_overflow_strategy=self.working_memory_overflow_strategy)
-        self.active_fires = 0
+        # Ids of the neurons whose buffer changed since the last dispatch
+        self._ready = deque()
+
+    def add_neuron(self, neuron: Neuron):
+        """
+        Adds a neuron to the brain, replacing any neuron with the same ID.
+
+        Args:
+            neuron (Neuron): The neuron to add.
+        """
+        self.neurons[neuron.id] = neuron
+
+    def remove_neuron(self, neuron_id: str):
+        """
+        Removes a neuron from the brain.
+
+        Args:
+            neuron_id (str): The ID of the neuron to remove.
+        """
+        del self.neurons[neuron_id]
+
+    def build(self):
+        """
+        Precomputes the adjacency of the brain along with its entry and polled nodes.
+        Successors that are not neurons of the brain are left out of the adjacency.
+        It is called at the start of every run, so that edits of the neurons made in place are taken into account.
+        """
+        adjacency: Dict[str, tuple] = {
+            neuron_id: tuple(successor for successor in neuron.successors if successor in self.neurons)
+            for neuron_id, neuron in self.neurons.items()
+        }
+        for neuron_id, neuron in self.neurons.items():
+            neuron.successor_ids = adjacency[neuron_id]
+            neuron.reply_cache = self.reply_cache
+        self._entry_nodes = [neuron_id for neuron_id, neuron in self.neurons.items() if neuron.is_entrypoint]
+        # Neurons that may become ready without receiving a message, e.g. with clock based triggers
+        self._polled_nodes = [neuron_id for neuron_id, neuron in self.neurons.items() if neuron.needs_polling]
+
+    def successors(self, node_id: str):
+        """
+        Gets the successors of a neuron within the brain.
+
+        Args:
+            node_id (str): The ID of the neuron.
+
+        Returns:
+            tuple: The IDs of the successors of the neuron.
+        """
+        neuron = self.neurons.get(node_id)
+        if neuron is None:
+            return ()
+        return tuple(successor for successor in neuron.successors if successor in self.neurons)
 
     def run(self, conversation):
         """
         Runs the brain execution synchronously.
 
+        The scheduler runs on its own event loop in a background thread, so this also works from
+        environments that already run an event loop such as notebooks.
+
         Args:
             conversation: The conversation to execute. Conversation a list of dict [{'role':'user','content':'Hello World'}]
 
         Yields:
             List: The list of messages each time a process is finished. They are yielded as Message class
         """
-        # Create a thread pool executor with the specified number of workers
-        executor = ThreadPoolExecutor(max_workers=self.workers)
-        start_time = time.time()
-        futures = []
+        replies = queue.Queue()
+        # Local to this run, set to stop the scheduler when the caller stops consuming early
+        stop = threading.Event()
+        thread = threading.Thread(target=asyncio.run, args=(self._drive(conversation, replies, stop),), name=f"brain-{self.name}", daemon=True)
+        thread.start()
+        try:
+            while True:
+                kind, value = replies.get()
+                if kind == "done":
+                    break
+                if kind == "error":
+                    raise value
+                yield value
+        finally:
+            # Stop the scheduler if the caller stopped consuming early
+            stop.set()
+            thread.join()
+
+    async def _drive(self, conversation, replies: queue.Queue, stop: threading.Event):
+        """
+        Forwards the replies of arun to a thread safe queue consumed by run.
+
+        Args:
+            conversation: The conversation to execute.
+            replies (queue.Queue): The queue receiving ("reply", reply), ("error", exception) and ("done", None) items.
+            stop (threading.Event): The event set by run to stop the execution.
+        """
+        try:
+            async for reply in self.arun(conversation, stop=stop):
+                replies.put(("reply", reply))
+        except Exception as e:
+            replies.put(("error", e))
+        finally:
+            replies.put(("done", None))
+
+    async def arun(self, conversation, stop: threading.Event = None):
+        """
+        Runs the brain execution on the current event loop, firing neurons in a thread pool.
+        Neurons whose step implements aforward are awaited on the event loop instead, so that
+        I/O bound fires overlap without holding a worker thread each.
+
+        Args:
+            conversation: The conversation to execute. Conversation a list of dict [{'role':'user','content':'Hello World'}]
+            stop (threading.Event, optional): An event that stops the execution when set, e.g. from another thread. Defaults to None.
+
+        Yields:
+            Reply: The reply of each neuron as soon as its fire is finished.
+        """
+        loop = asyncio.get_running_loop()
+        # Reuse the thread pool shared by the runs with the same number of workers
+        executor = _get_executor(self.workers)
+        start_time = time.monotonic()
+        # Map each running future to the id of the neuron it fires
+        futures = {}
+        firing = set()
+        # Futures push themselves here when they complete, and wake up the scheduler
+        completed = deque()
+        wake = asyncio.Event()
+        # Bounds the number of concurrent fires, a slot is released as soon as its fire completes
+        slots = threading.BoundedSemaphore(self.max_concurrent_fires)
+        # The neurons may have been edited in place since the last run, e.g. through the neurons dict,
+        # so the topology is rebuilt once per run
+        self.build()
+        pending_entries = deque(self._entry_nodes)
+
+        # Neurons push their id on the ready queue whenever they receive a message,
+        # every neuron is checked once at start up
+        self._ready.clear()
+        self._ready.extend(self.neurons)
+        for neuron in self.neurons.values():
+            neuron.on_receive = self._ready.append
+
+        def on_done(future):
+            slots.release()
+            completed.append(future)
+            wake.set()
+
+        # The conversation is shared read-only by every fire of the run, so it is bound once per neuron.
+        # Neurons with an asynchronous step are awaited on the event loop, the others run in the thread pool
+        fires = {
+            neuron_id: partial(neuron.afire_with_retry if neuron.is_async else neuron.fire_with_retry, conversation)
+            for neuron_id, neuron in self.neurons.items()
+        }
+        async_nodes = {neuron_id for neuron_id, neuron in self.neurons.items() if neuron.is_async}
+
+        def submit(neuron_id, context, working_memory=None):
+            # Returns False without blocking if every slot is taken
+            if not slots.acquire(blocking=False):
+                return False
+            firing.add(neuron_id)
+            if neuron_id in async_nodes:
+                future = loop.create_task(fires[neuron_id](context, working_memory))
+            else:
+                future = loop.run_in_executor(executor, fires[neuron_id], context, working_memory)
+            future.add_done_callback(on_done)
+            futures[future] = neuron_id
+            return True
 
         try:
-            # Submit the entry nodes for execution
-            for entry_node in self.entry_nodes:
-                # Wait if the maximum number of concurrent fires is reached
-                while self.active_fires >= self.max_concurrent_fires:
-                    time.sleep(0.1)
-                
-                self.active_fires += 1
-                # Submit the fire_with_retry task to the executor
-                futures.append(executor.submit(self.neurons[entry_node].fire_with_retry, conversation, []))
-
-            # Continuously check for completed futures and new neurons to fire
             while True:
                 # Check for timeout
-                if time.time() - start_time > self.timeout:
-                    logger.warning(f"Brain {self.name} execution timed out")
+                remaining = self.timeout - (time.monotonic() - start_time)
+                if remaining <= 0:
+                    logger.warning("Brain %s execution timed out", self.name)
+                    break
+                if stop is not None and stop.is_set():
                     break
 
-                # Process completed futures
-                for future in futures[:]:
-                    if future.done():
-                        try:
-                            result = future.result()
-                            
-                            if result:
-                                neuron, reply, messages = result
+                # Block until a fire completes, or until the iteration delay elapses so clock based triggers are polled
+                if futures and not completed:
+                    try:
+                        await asyncio.wait_for(wake.wait(), timeout=min(remaining, self.iteration_delay))
+                    except asyncio.TimeoutError:
+                        pass
+                wake.clear()
+                # Only the completed futures are visited, whatever the number of running fires
+                done = list(completed)
+                completed.clear()
+
+                # Process completed futures, grouping the routed messages by receiver
+                outbox = defaultdict(list)
+                for future in done:
+                    neuron_id = futures.pop(future)
+                    firing.discard(neuron_id)
+                    try:
+                        result = future.result()
+                        
+                        if result:
+                            neuron, reply, messages = result
 
-                                ## Yield the reply in textual format
-                                yield reply
+                            ## Yield the reply in textual format
+                            yield reply
+                            
+                            ## Update the ran neuron
+                            self.neurons[neuron.id] = neuron
                                 
-                                ## Update the ran neuron
-                                self.neurons[neuron.id] = neuron
+                            for message in messages:
+                                outbox[message.receiver_id].append(message)
                                     
-                                for message in messages:
-                                    # Receive the message and append it to the working memory
-                                    self.neurons[message.receiver_id].receive(message)
-                                    self.working_memory.append(message)
-                                        
-                        except Exception as e:
-                            logger.error(f"Error processing future: {str(e)}")
-                        finally:
-                            # Decrement the active fires count and remove the future
-                            self.active_fires -= 1
-                            futures.remove(future)
+                    except Exception as e:
+                        logger.error("Error processing future: %s", e)
+                    finally:
+                        # Messages received while firing may still be pending in the buffer
+                        self._ready.append(neuron_id)
 
-                # Check for new neurons to fire
-                for neuron_id, neuron in self.neurons.items():
-                    should_fire = neuron.should_fire()
-                    if should_fire is not None and self.active_fires < self.max_concurrent_fires:
-                        # Increment the active fires count and submit the fire_with_retry task
-                        self.active_fires += 1
-                        futures.append(executor.submit(neuron.fire_with_retry, conversation, should_fire, self.working_memory))
+                # Deliver the messages of this round once per receiver and append them to the working memory
+                delivered = []
+                for receiver_id, received in outbox.items():
+                    receiver = self.neurons.get(receiver_id)
+                    if receiver is None:
+                        logger.error("Dropping %d message(s) for unknown neuron %s", len(received), receiver_id)
+                        continue
+                    receiver.receive_batch(received)
+                    delivered.extend(received)
+                if delivered:
+                    self.working_memory.extend(delivered)
 
-                # Wait for the iteration delay
-                time.sleep(self.iteration_delay)
+                # Submit the entry nodes for execution as long as slots are available
+                while pending_entries and submit(pending_entries[0], []):
+                    pending_entries.popleft()
+
+                # Only neurons that received a message can have become ready, unless nothing completed
+                # in which case the neurons with clock based triggers are polled as well
+                poll = not done
+                candidates = dict.fromkeys(self._ready)
+                self._ready.clear()
+                if poll:
+                    candidates.update(dict.fromkeys(self._polled_nodes))
+
+                # Check for new neurons to fire
+                for neuron_id in candidates:
+                    if neuron_id in firing:
+                        continue
+                    should_fire = self.neurons[neuron_id].should_fire()
+                    if should_fire is None:
+                        continue
+                    # Submit the fire_with_retry task, or keep the neuron queued until a slot frees up
+                    if not submit(neuron_id, should_fire, self.working_memory):
+                        self._ready.append(neuron_id)
 
                 # Break if no active futures and no neurons ready to fire
-                if not futures and not any(n.should_fire() for n in self.neurons.values()):
+                if not futures and not pending_entries and not self._ready and poll:
                     break
 
         except Exception as e:
-            logger.error(f"Error in brain execution: {str(e)}")
+            logger.error("Error in brain execution: %s", e)
             raise
         finally:
-            # Shutdown the executor
-            executor.shutdown(wait=True)
+            for neuron in self.neurons.values():
+                neuron.on_receive = None
+            # Wait for the fires still running, the shared executor stays alive
+            if futures:
+                await asyncio.wait(futures)
 
     @property
     def entry_nodes(self):
@@ -135,4 +341,15 @@ class Brain:
             List[str]: The list of entry node IDs.
         """
         # Filter the neurons to get the entry nodes
-        return [neuron_id for neuron_id, neuron in self.neurons.items() if neuron.is_entrypoint]
\ No newline at end of file
+        return [neuron_id for neuron_id, neuron in self.neurons.items() if neuron.is_entrypoint]
+
+    @property
+    def terminal_nodes(self):
+        """
+        Gets the terminal nodes of the brain.
+
+        Returns:
+            List[str]: The list of terminal node IDs.
+        """
+        # Filter the neurons to get the terminal nodes
+        return [neuron_id for neuron_id, neuron in self.neurons.items() if neuron.is_terminal]
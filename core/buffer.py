@@ -3,15 +3,26 @@ core/buffer.py
 
 This module provides a Buffer class to store messages from predecessors.
 It handles receiving messages, cleaning up stale messages, and providing context for predecessors.
+Messages are stored in a structure of arrays: every predecessor owns a fixed slot, and the
+timestamps and types of the slots are kept in contiguous arrays so that staleness and clearing are vectorized.
 """
 
 from typing import Dict, List
 from core.message import Message, MessageType
+import numpy as np
 import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Compact codes of the message types stored in the buffer type array
+_TYPE_CODES = {MessageType.EMPTY: 0, MessageType.PERSISTENT: 1, MessageType.PAYLOAD: 2}
+_EMPTY_CODE = _TYPE_CODES[MessageType.EMPTY]
+_PERSISTENT_CODE = _TYPE_CODES[MessageType.PERSISTENT]
+
+# Immutable empty message shared by every empty slot of every buffer
+_EMPTY_MESSAGE = Message(type=MessageType.EMPTY)
+
 class Buffer:
     def __init__(self, predecessors_ids: List[str], max_age: float = None):
         """
@@ -21,10 +32,88 @@ class Buffer:
             predecessors_ids (List[str]): A list of predecessor IDs.
             max_age (float): The maximum age of a message before it is considered stale. Defaults to None.
         """
+        # Assign a fixed slot to each predecessor, the IDs are kept as a tuple that can be handed out without copy
+        self._ids = tuple(predecessors_ids)
+        self._idx = {predecessor: i for i, predecessor in enumerate(self._ids)}
+        n = len(self._ids)
         # Initialize the buffer with empty messages for each predecessor
-        self.messages = {predecessor: Message(type=MessageType.EMPTY) for predecessor in predecessors_ids}
-        self.message_timestamps = {predecessor: time.time() for predecessor in predecessors_ids}
+        self._msgs: List[Message] = [_EMPTY_MESSAGE] * n
+        # Reception times on the monotonic clock, in nanoseconds
+        self._timestamps = np.full(n, time.monotonic_ns(), dtype=np.int64)
+        # Type codes of the slots, a bytearray for cheap scalar access on every reception,
+        # with a NumPy view sharing its memory for the vectorized scans
+        self._types = bytearray([_EMPTY_CODE]) * n
+        self._types_array = np.frombuffer(self._types, dtype=np.uint8)
         self.max_age = max_age
+        # Incremented whenever the buffered messages change
+        self.version = 0
+        # Number of predecessors without a message, maintained on every change
+        self._missing = n
+        # Last context built by get_context, as (version, predecessor IDs, context)
+        self._context_cache = None
+
+    @property
+    def max_age(self) -> float:
+        """
+        Get the maximum age of a message before it is considered stale.
+
+        Returns:
+            float: The maximum age in seconds, or None if messages never become stale.
+        """
+        return self._max_age
+
+    @max_age.setter
+    def max_age(self, value: float):
+        """
+        Set the maximum age of a message, precomputing it in nanoseconds for the stale check.
+
+        Args:
+            value (float): The maximum age in seconds, or None if messages never become stale.
+        """
+        self._max_age = value
+        self._max_age_ns = None if value is None else int(value * 1e9)
+        # Scan again on the next cleanup, so that a lowered max age applies right away
+        self._next_cleanup_ns = 0
+
+    @property
+    def messages(self) -> Dict[str, Message]:
+        """
+        Get the buffered messages.
+
+        Returns:
+            Dict[str, Message]: A read-only snapshot of the message buffered for each predecessor.
+        """
+        return dict(zip(self._ids, self._msgs))
+
+    @property
+    def predecessors_ids(self) -> tuple:
+        """
+        Get the IDs of the predecessors, in slot order.
+
+        Returns:
+            tuple: The predecessor IDs, computed once so that triggers can return them as a context without rebuilding a list.
+        """
+        return self._ids
+
+    @property
+    def missing(self) -> int:
+        """
+        Get the number of predecessors whose message is EMPTY, in constant time.
+
+        Returns:
+            int: The number of missing messages, 0 when every predecessor delivered a message.
+        """
+        return self._missing
+
+    @property
+    def message_timestamps(self) -> Dict[str, float]:
+        """
+        Get the reception timestamps of the buffered messages.
+
+        Returns:
+            Dict[str, float]: A read-only snapshot of the last reception time for each predecessor, in seconds of time.monotonic().
+        """
+        return dict(zip(self._ids, (self._timestamps / 1e9).tolist()))
 
     def receive(self, message: Message):
         """
@@ -32,43 +121,91 @@ class Buffer:
 
         Args:
             message (Message): The message to receive.
+
+        Returns:
+            bool: True if the message was stored, False if the sender is not a predecessor.
         """
-        # Get the sender ID from the message
-        sender_id = message.sender_id
-        # Check if the sender ID is in the buffer's messages
-        if sender_id in self.messages:
-            # Update the message and timestamp for the sender ID
-            self.messages[sender_id] = message
-            self.message_timestamps[sender_id] = time.time()
+        # Get the slot of the sender, if it is a predecessor
+        i = self._idx.get(message.sender_id)
+        if i is None:
+            return False
+        # Update the message, type and timestamp of the slot
+        code = _TYPE_CODES[message.type]
+        self._missing += (code == _EMPTY_CODE) - (self._types[i] == _EMPTY_CODE)
+        self._msgs[i] = message
+        self._types[i] = code
+        self._timestamps[i] = time.monotonic_ns()
+        self.version += 1
+        return True
+
+    def receive_batch(self, messages: List[Message]):
+        """
+        Receive several messages at once, sharing a single timestamp.
+
+        Args:
+            messages (List[Message]): The messages to receive, later messages from the same sender win.
 
-    def cleanup_stale_messages(self):
+        Returns:
+            bool: True if at least one message was stored.
+        """
+        now = time.monotonic_ns()
+        received = False
+        for message in messages:
+            i = self._idx.get(message.sender_id)
+            if i is not None:
+                code = _TYPE_CODES[message.type]
+                self._missing += (code == _EMPTY_CODE) - (self._types[i] == _EMPTY_CODE)
+                self._msgs[i] = message
+                self._types[i] = code
+                self._timestamps[i] = now
+                received = True
+        if received:
+            self.version += 1
+        return received
+
+    def cleanup_stale_messages(self, force: bool = False):
         """
         Clean up stale messages from the buffer.
+
+        The buffer is scanned at most once per quarter of max_age, so that a neuron firing in bursts
+        does not scan it on every fire. A message may thus outlive max_age by up to a quarter of it.
+
+        Args:
+            force (bool): Whether to scan the buffer even if the last scan is recent. Defaults to False.
         """
         # Check if max_age is set
-        if self.max_age is None:
+        if self._max_age_ns is None:
             # If not, do nothing
             return
+        now = time.monotonic_ns()
+        if not force and now < self._next_cleanup_ns:
+            return
+        self._next_cleanup_ns = now + self._max_age_ns // 4
 
-        # Get the current time
-        current_time = time.time()
-        # Iterate over the predecessors in the buffer
-        for predecessor in self.messages:
-            # Check if the message is stale (i.e., its age exceeds max_age)
-            if current_time - self.message_timestamps[predecessor] > self.max_age:
-                # If stale, reset the message to EMPTY
-                self.messages[predecessor] = Message(type=MessageType.EMPTY)
+        # Find the non empty messages whose age exceeds max_age, for all predecessors at once
+        stale = np.flatnonzero(((now - self._timestamps) > self._max_age_ns) & (self._types_array != _EMPTY_CODE))
+        if not stale.size:
+            return
+        # Reset the stale messages to EMPTY
+        for i in stale:
+            self._msgs[i] = _EMPTY_MESSAGE
+        self._types_array[stale] = _EMPTY_CODE
+        self._missing += stale.size
+        self.version += 1
 
     def clear(self):
         """
         Clear the buffer.
         """
-        # Iterate over the predecessors and their messages in the buffer
-        for predecessor, buffered_message in self.messages.items():
-            # Check if the message is not PERSISTENT
-            if buffered_message.type != MessageType.PERSISTENT:
-                # If not, reset the message to EMPTY
-                self.messages[predecessor] = Message(type=MessageType.EMPTY)
+        # Reset every message that is neither PERSISTENT nor already EMPTY
+        cleared = np.flatnonzero((self._types_array != _PERSISTENT_CODE) & (self._types_array != _EMPTY_CODE))
+        if not cleared.size:
+            return
+        for i in cleared:
+            self._msgs[i] = _EMPTY_MESSAGE
+        self._types_array[cleared] = _EMPTY_CODE
+        self._missing += cleared.size
+        self.version += 1
 
     def get_context(self, predecessors_ids: List[str]):
         """
@@ -78,10 +215,23 @@ class Buffer:
             predecessors_ids (List[str]): A list of predecessor IDs.
 
         Returns:
-            Dict[str, Message]: A dictionary of messages for the given predecessors.
+            Dict[str, Message]: A dictionary of messages for the given predecessors, referencing the buffered messages rather than copies.
         """
-        # Return a dictionary of messages for the given predecessors
-        return {k: self.messages[k] for k in predecessors_ids}
+        # Reuse the last context if it was built for the same predecessors and the buffer did not change since.
+        # The version is read before the context is built, so that a message received meanwhile from another
+        # thread leaves the cached context under an older version instead of the new one
+        version = self.version
+        cached = self._context_cache
+        if cached is not None and cached[0] == version and cached[1] == predecessors_ids:
+            # A shallow copy is cheaper than a rebuild and keeps the cached context safe from callers
+            return cached[2].copy()
+        # Return a dictionary of messages for the given predecessors, messages are immutable so no copy is needed
+        msgs, idx = self._msgs, self._idx
+        context = {k: msgs[idx[k]] for k in predecessors_ids}
+        # Mutable predecessor IDs are copied, so that a list modified in place by the caller does not match stale entries
+        ids = predecessors_ids if isinstance(predecessors_ids, tuple) else list(predecessors_ids)
+        self._context_cache = (version, ids, context)
+        return context.copy()
 
     def __call__(self, predecessor_id: str):
         """
@@ -94,4 +244,4 @@ class Buffer:
             Message: The message for the given predecessor.
         """
         # Return the message for the given predecessor ID
-        return self.messages[predecessor_id]
\ No newline at end of file
+        return self._msgs[self._idx[predecessor_id]]
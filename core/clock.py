@@ -3,6 +3,7 @@ Core concepts and logics:
 This module implements a simple clock to track when a neuron was last fired.
 The clock maintains a timestamp of the last firing and a count of the total firings.
 It provides an update method to refresh the clock when a new firing occurs.
+Timestamps come from the monotonic clock, so they are only meaningful relative to time.monotonic().
 """
 
 import time
@@ -10,9 +11,21 @@ import time
 class Clock:
     def __init__(self):
         # Initialize the clock with no last fired time and a fire count of 0
-        self.last_fired: float = None
+        self.last_fired_ns: int = None
         self.fire_count: int = 0
 
+    @property
+    def last_fired(self) -> float:
+        """
+        Get the last fired time in seconds.
+
+        Returns:
+            float: The last fired time on the time.monotonic() clock, or None if the clock was never updated.
+        """
+        if self.last_fired_ns is None:
+            return None
+        return self.last_fired_ns / 1e9
+
     def update(self):
         """
         Update the clock by setting the current time as the last fired time and incrementing the fire count.
@@ -20,7 +33,7 @@ class Clock:
         Returns:
             None
         """
-        # Get the current time using the time module
-        self.last_fired = time.time()
+        # Get the current time in nanoseconds using the monotonic clock
+        self.last_fired_ns = time.monotonic_ns()
         # Increment the fire count by 1
-        self.fire_count += 1
\ No newline at end of file
+        self.fire_count += 1
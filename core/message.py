@@ -4,14 +4,53 @@ This module defines the core data structures for messages in the system.
 It includes MessageType Enum, Reply and Message models.
 The MessageType Enum defines the types of messages that can be sent.
 The Reply model represents the response to a message, containing inputs, outputs and metadata.
-The Message model represents a message, containing its type, sender and receiver IDs, reply, priority, creation time and metadata.
+The Message class represents a message, containing its type, sender and receiver IDs, reply, priority, creation time and metadata.
+Messages are created on every hop of a brain run, so Message is a slotted dataclass rather than a pydantic model:
+only its type and priority are validated, which keeps construction cheap and instances small.
+Messages are serialized to JSON bytes with orjson when it is installed, falling back to the standard json module.
 """
 
-from pydantic import BaseModel, Field
+from dataclasses import dataclass, field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 from typing import Dict, Any
+import hashlib
+import json
 import time
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializes an object to JSON bytes with sorted keys, using orjson when it is installed.
+
+    Args:
+        obj (Any): The object to serialize. Values that are not JSON types are converted with str.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, sort_keys=True, default=str).encode()
+
+def loads(data: bytes) -> Any:
+    """
+    Deserializes JSON bytes, using orjson when it is installed.
+
+    Args:
+        data (bytes): The JSON to deserialize.
+
+    Returns:
+        Any: The deserialized object.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 class MessageType(str, Enum):
     """Enum representing the types of messages."""
     EMPTY = "empty"
@@ -20,20 +59,45 @@ class MessageType(str, Enum):
 
 class Reply(BaseModel):
     """Model representing the response to a message."""
+    model_config = ConfigDict(frozen=True)
+
     str_input: str
     str_output: str
     context: list = None
     metadata: Dict[str, Any] = Field(default_factory=dict)  # Additional metadata of the reply
 
-class Message(BaseModel):
-    """Model representing a message."""
+def _reply_fields(reply: Reply) -> list:
+    """
+    Gets the fields of a reply that identify its content.
+
+    Args:
+        reply (Reply): The reply, or None.
+
+    Returns:
+        list: The input, output, context and metadata of the reply, or None.
+    """
+    if reply is None:
+        return None
+    return [reply.str_input, reply.str_output, reply.context, reply.metadata]
+
+@dataclass(frozen=True, slots=True)
+class Message:
+    """Class representing a message. Messages are immutable so that a single instance can be shared by all its receivers."""
     type: MessageType  # Type of the message
     sender_id: str = None  # ID of the sender
     receiver_id: str = None  # ID of the receiver
     reply: Reply = None  # Reply to the message
-    priority: int = Field(default=0, ge=0, le=10)  # Priority of the message
-    created_at: float = Field(default_factory=lambda: time.time())  # Time the message was created
-    metadata: Dict[str, Any] = Field(default_factory=dict)  # Additional metadata of the message
+    priority: int = 0  # Priority of the message, between 0 and 10
+    created_at: float = field(default_factory=time.time)  # Time the message was created
+    metadata: Dict[str, Any] = field(default_factory=dict)  # Additional metadata of the message
+    content_hash: bytes = field(default=None, repr=False, compare=False)  # Digest of the content, see digest
+
+    def __post_init__(self):
+        """Coerce the type to a MessageType and validate the priority."""
+        if self.type.__class__ is not MessageType:
+            # The dataclass is frozen, so the coerced value is set through object.__setattr__
+            object.__setattr__(self, "type", MessageType(self.type))
+        self.validate_priority(self.priority)
 
     @staticmethod
     def validate_priority(v):
@@ -41,4 +105,66 @@ class Message(BaseModel):
         # Check if the priority is within the valid range
         if not (0 <= v <= 10):
             raise ValueError("Priority must be between 0 and 10")
-        return v
\ No newline at end of file
+        return v
+
+    def digest(self) -> bytes:
+        """
+        Gets the content hash of the message, computing it on first use.
+
+        A message carrying the reply of a cacheable neuron is hashed by the neuron from the reply cache key
+        of the fire that produced it and the message type, so hashes roll up along the graph like a Merkle tree
+        without hashing the replies again. Other messages are hashed from their type and reply.
+
+        Returns:
+            bytes: The content hash of the message.
+        """
+        content_hash = self.content_hash
+        if content_hash is None:
+            content_hash = hashlib.blake2b(dumps([self.type.value, _reply_fields(self.reply)]), digest_size=16).digest()
+            # The hash only depends on immutable fields, so it is cached on the frozen instance
+            object.__setattr__(self, "content_hash", content_hash)
+        return content_hash
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the message to JSON bytes, e.g. to send it across a process boundary.
+
+        Returns:
+            bytes: The serialized message.
+        """
+        reply = self.reply
+        return dumps({
+            'type': self.type.value,
+            'sender_id': self.sender_id,
+            'receiver_id': self.receiver_id,
+            'reply': None if reply is None else {
+                'str_input': reply.str_input,
+                'str_output': reply.str_output,
+                'context': reply.context,
+                'metadata': reply.metadata,
+            },
+            'priority': self.priority,
+            'created_at': self.created_at,
+            'metadata': self.metadata,
+            'content_hash': None if self.content_hash is None else self.content_hash.hex(),
+        })
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Message":
+        """
+        Deserializes a message serialized with to_bytes.
+
+        Args:
+            data (bytes): The serialized message.
+
+        Returns:
+            Message: The deserialized message.
+        """
+        fields = loads(data)
+        reply = fields['reply']
+        if reply is not None:
+            # Null fields are left to their defaults, which Reply does not accept explicitly
+            fields['reply'] = Reply(**{name: value for name, value in reply.items() if value is not None})
+        if fields.get('content_hash') is not None:
+            fields['content_hash'] = bytes.fromhex(fields['content_hash'])
+        return cls(**fields)
@@ -6,12 +6,17 @@ The neuron's behavior is determined by its step function, activation function, a
 The neuron also has a buffer to store messages and a clock to track time.
 """
 
+from dataclasses import replace
 from typing import Dict, List, Any
 
 from core.message import Message, MessageType
 from core.buffer import Buffer
 from core.clock import Clock
+from core.reply_cache import ReplyCache, minhash_signature, signature_similarity
+from core.step import Step
 
+import asyncio
+import hashlib
 import time
 import logging
 
@@ -22,15 +27,17 @@ class Neuron:
         self, 
         id: str,
         description:str= None,
-        predecessors: Dict[str, Any] = {},
-        successors: Dict[str, Any] = {},
-        triggers: List = [],
+        predecessors: Dict[str, Any] = None,
+        successors: Dict[str, Any] = None,
+        triggers: List = None,
         step=None,
         activation=None,
         is_entrypoint: bool = False,
         is_terminal: bool = False,
         max_retry_attempts: int = 3,
-        retry_delay: float = 1.0
+        retry_delay: float = 1.0,
+        cacheable: bool = False,
+        memoization_threshold: float = None
     ):
         """
         A neuron in the network.
@@ -46,23 +53,58 @@ class Neuron:
             is_terminal (bool): Whether the neuron is a terminal.
             max_retry_attempts (int): The maximum number of retry attempts.
             retry_delay (float): The delay between retry attempts.
+            cacheable (bool): Whether the step is deterministic, so that its reply can be reused when the neuron fires again on the same inputs.
+            memoization_threshold (float): If set, the last reply is reused when the inputs of a fire are at least this similar to the inputs it was computed on. Defaults to None.
         """
         self.id = id
-        self.predecessors = predecessors
-        self.successors = successors
-        self.triggers = triggers
+        # Fresh containers per neuron, so that neurons never share their defaults
+        self.predecessors = predecessors if predecessors is not None else {}
+        self.successors = successors if successors is not None else {}
+        # Successor IDs used for routing, restricted to the neurons of the brain by Brain.build.
+        # Until then the neuron routes to its successors as they are
+        self.successor_ids = None
+        self.triggers = triggers if triggers is not None else []
         self.step = step
         self.activation = activation
         self.is_entrypoint = is_entrypoint
         self.is_terminal = is_terminal
         self.max_retry_attempts = max_retry_attempts
         self.retry_delay = retry_delay
+        self.cacheable = cacheable
+        # Cache of replies, local to the neuron until a Brain replaces it by the cache shared by its neurons
+        self.reply_cache = ReplyCache(max_size=128) if cacheable else None
+        self.memoization_threshold = memoization_threshold
+        # Signature of the inputs of the last computed reply, and the drift accumulated by reusing it since
+        self._mem_signature = None
+        self._mem_reply = None
+        self._mem_drift = 0.0
         # Initialize the buffer with the predecessor IDs and a max age of 5 minutes
         self.buffer = Buffer(predecessors_ids=self.predecessors.keys(), max_age=300)  
         self.clock = Clock()
+        # Callback invoked with the neuron id when a message lands in the buffer, set by the Brain
+        self.on_receive = None
+        # Last should_fire result, keyed by the buffer version and fire count it was computed for
+        self._should_fire_cache = None
         
     def receive(self, message:Message):
-        self.buffer.receive(message)
+        """
+        Receive a message into the buffer and notify the owner of the new buffer state.
+
+        Args:
+            message (Message): The message to receive.
+        """
+        if self.buffer.receive(message) and self.on_receive is not None:
+            self.on_receive(self.id)
+
+    def receive_batch(self, messages: List[Message]):
+        """
+        Receive several messages into the buffer, notifying the owner at most once.
+
+        Args:
+            messages (List[Message]): The messages to receive.
+        """
+        if self.buffer.receive_batch(messages) and self.on_receive is not None:
+            self.on_receive(self.id)
 
     def fire(self, messages, context, working_memory=None):
         """
@@ -75,12 +117,99 @@ class Neuron:
         Returns:
             tuple: A tuple containing the result and messages.
         """
-        # Clean up stale messages from the buffer
+        step_context, key, signature, reply = self._prepare_fire(messages, context)
+        if reply is None:
+            # Get the reply from the step function
+            reply = self.step.forward(messages, step_context, working_memory=None)
+            self._remember(reply, key, signature)
+        return self._complete_fire(reply, key)
+
+    async def afire(self, messages, context, working_memory=None):
+        """
+        Fire the neuron, awaiting the asynchronous forward of its step.
+
+        Args:
+            messages: The messages to fire.
+            context: The context for the fire.
+
+        Returns:
+            tuple: A tuple containing the neuron, the reply and the routed messages.
+        """
+        step_context, key, signature, reply = self._prepare_fire(messages, context)
+        if reply is None:
+            # Get the reply from the step function, without blocking the event loop
+            reply = await self.step.aforward(messages, step_context, working_memory=None)
+            self._remember(reply, key, signature)
+        return self._complete_fire(reply, key)
+
+    def _prepare_fire(self, messages, context):
+        """
+        Gather the inputs of a fire and look up a reply that can be reused for them.
+
+        Args:
+            messages: The messages to fire.
+            context: The context for the fire.
+
+        Returns:
+            tuple: The step context, the reply cache key, the MinHash signature and the reused reply, or None if the step must be evaluated.
+        """
+        # Clean up stale messages from the buffer, the buffer amortizes the scan over bursts of fires
         self.buffer.cleanup_stale_messages()
-        # Get the reply from the step function
-        reply = self.step.forward(messages, self.buffer.get_context(context), working_memory=None)
+        step_context = self.buffer.get_context(context)
+        # Reuse the reply of a previous fire on the same inputs if the step is deterministic
+        key = None
+        reply = None
+        if self.cacheable and self.reply_cache is not None:
+            # The class of the step is part of the key, so that a replaced step never reuses the replies of another one
+            step_type = type(self.step)
+            step_args = (step_type.__module__, step_type.__qualname__, getattr(self.step, "str_input", None), getattr(self.step, "step_args", None))
+            key = self.reply_cache.key(self.id, messages, step_context, args=step_args)
+            reply = self.reply_cache.get(key)
+        # Reuse the last reply if the inputs are close enough to the ones it was computed on
+        signature = None
+        if reply is None and self.memoization_threshold is not None:
+            signature = minhash_signature(self._memoization_text(messages, step_context))
+            reply = self._recall(signature)
+            if reply is not None:
+                # An approximate reply must neither be cached nor identified by the key of the exact inputs
+                key = None
+        return step_context, key, signature, reply
+
+    def _remember(self, reply, key, signature):
+        """
+        Store a freshly computed reply for the next fires.
+
+        Args:
+            reply: The reply of the step.
+            key: The reply cache key of the fire, or None if the neuron is not cacheable.
+            signature: The MinHash signature of the inputs, or None if the neuron does not memoize.
+        """
+        if key is not None:
+            self.reply_cache.put(key, reply)
+        if signature is not None:
+            self._mem_signature, self._mem_reply, self._mem_drift = signature, reply, 0.0
+
+    def _complete_fire(self, reply, key=None):
+        """
+        Route a reply to the successors and reset the neuron for its next fire.
+
+        Args:
+            reply: The reply of the fire.
+            key: The reply cache key of the fire, from which the content hash of the routed messages carrying its reply is derived. Defaults to None.
+
+        Returns:
+            tuple: A tuple containing the neuron, the reply and the routed messages.
+        """
         # Map the reply to the successors using the activation function
         messages = self.activation.route(reply, self, working_memory=None)
+        if key is not None:
+            # The key of the fire identifies its reply, so the messages carrying it are hashed from the key and their type
+            # for the cache keys of the successors. Messages built otherwise by the activation are hashed from their content
+            messages = [
+                replace(message, content_hash=hashlib.blake2b(key + message.type.value.encode(), digest_size=16).digest())
+                if message.content_hash is None and message.reply is reply else message
+                for message in messages
+            ]
         
         # Clear the buffer from all non persistent message
         self.buffer.clear() 
@@ -89,6 +218,95 @@ class Neuron:
         
         return self, reply, messages
 
+    @staticmethod
+    def _memoization_text(conversation, context):
+        """
+        Flattens the inputs of a fire into the text signed for memoization.
+
+        Args:
+            conversation: The conversation of the fire.
+            context (Dict[str, Message]): The buffered messages the neuron fires on.
+
+        Returns:
+            str: The contents of the conversation followed by the outputs of the context replies.
+        """
+        parts = [str(turn.get('content', '')) if isinstance(turn, dict) else str(turn) for turn in conversation]
+        parts.extend(message.reply.str_output for message in context.values() if message.reply is not None)
+        return "\n".join(parts)
+
+    def _recall(self, signature):
+        """
+        Get the memoized reply if the inputs did not drift too far from the ones it was computed on.
+
+        Args:
+            signature: The MinHash signature of the inputs of the fire.
+
+        Returns:
+            Reply: The memoized reply, or None if the neuron must be evaluated.
+        """
+        if self._mem_signature is None:
+            return None
+        # Every reuse accumulates its distance, so slowly drifting inputs eventually force an evaluation
+        distance = 1.0 - signature_similarity(signature, self._mem_signature)
+        if self._mem_drift + distance > 1.0 - self.memoization_threshold:
+            return None
+        self._mem_drift += distance
+        return self._mem_reply
+
+    def fire_with_retry(self, messages, context, working_memory=None):
+        """
+        Fire the neuron, retrying up to max_retry_attempts times on failure.
+
+        Args:
+            messages: The messages to fire.
+            context: The context for the fire.
+            working_memory: The working memory of the brain.
+
+        Returns:
+            tuple: A tuple containing the neuron, the reply and the routed messages.
+        """
+        for attempt in range(1, self.max_retry_attempts + 1):
+            try:
+                return self.fire(messages, context, working_memory=working_memory)
+            except Exception as e:
+                # Give up and propagate the error on the last attempt
+                if attempt >= self.max_retry_attempts:
+                    raise
+                logger.warning("Neuron %s failed to fire (attempt %d/%d): %s", self.id, attempt, self.max_retry_attempts, e)
+                time.sleep(self.retry_delay)
+
+    async def afire_with_retry(self, messages, context, working_memory=None):
+        """
+        Asynchronous version of fire_with_retry, sleeping between attempts without blocking the event loop.
+
+        Args:
+            messages: The messages to fire.
+            context: The context for the fire.
+            working_memory: The working memory of the brain.
+
+        Returns:
+            tuple: A tuple containing the neuron, the reply and the routed messages.
+        """
+        for attempt in range(1, self.max_retry_attempts + 1):
+            try:
+                return await self.afire(messages, context, working_memory=working_memory)
+            except Exception as e:
+                # Give up and propagate the error on the last attempt
+                if attempt >= self.max_retry_attempts:
+                    raise
+                logger.warning("Neuron %s failed to fire (attempt %d/%d): %s", self.id, attempt, self.max_retry_attempts, e)
+                await asyncio.sleep(self.retry_delay)
+
+    @property
+    def is_async(self):
+        """
+        Check if the step of the neuron implements a native asynchronous forward.
+
+        Returns:
+            bool: True if the neuron should be fired with afire on the event loop rather than in a worker thread.
+        """
+        return isinstance(self.step, Step) and type(self.step).aforward is not Step.aforward
+
     def should_fire(self):
         """
         Check if the neuron should fire.
@@ -97,12 +315,33 @@ class Neuron:
             context: The context for the fire, or None if the neuron should not fire.
         """
         # If the clock has not been updated, update it
-        if self.clock.last_fired is None:
+        if self.clock.last_fired_ns is None:
             self.clock.update()
-            
+
+        # Reuse the last result if the buffer and the triggers did not change since
+        triggers = tuple(self.triggers)
+        key = (self.buffer.version, self.clock.fire_count, triggers)
+        if self._should_fire_cache is not None and self._should_fire_cache[0] == key:
+            return self._should_fire_cache[1]
+
         # Check each trigger to see if the neuron should fire
-        for trigger in self.triggers:
+        context = None
+        for trigger in triggers:
             context = trigger.condition(self)
             if context is not None:
-                return context
-        return None
\ No newline at end of file
+                break
+
+        # Only cache when no trigger depends on anything else than the buffer, such as time
+        if all(getattr(trigger, "cacheable", False) for trigger in triggers):
+            self._should_fire_cache = (key, context)
+        return context
+
+    @property
+    def needs_polling(self):
+        """
+        Check if the result of should_fire may change without the neuron receiving any message.
+
+        Returns:
+            bool: True if at least one trigger is not cacheable, e.g. because it depends on time.
+        """
+        return not all(getattr(trigger, "cacheable", False) for trigger in self.triggers)
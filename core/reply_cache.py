@@ -0,0 +1,129 @@
+"""
+Core concepts and logics:
+This module implements a content addressed cache of neuron replies.
+A reply is keyed by a digest of the neuron ID, the conversation and the buffered context the neuron fired on,
+so a neuron firing again on identical inputs during a brain run can reuse its reply instead of calling its step again.
+The messages carrying the reply of a cacheable neuron are hashed from the key of their fire and their type, so keys roll up
+along the graph like a Merkle tree and identify the whole subgraph upstream of a fire.
+The cache is bounded and evicts the least recently used replies first. It is shared by the neurons of a brain,
+which fire from several threads, so every access is guarded by a lock.
+It also provides MinHash signatures, a cheap estimate of the similarity of two inputs used by neurons
+to reuse their last reply when they fire on nearly identical inputs.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List
+from core.message import Message, Reply, dumps
+import hashlib
+import numpy as np
+import threading
+
+# Number of hash functions of a MinHash signature, and their random parameters
+MINHASH_SIZE = 64
+_rng = np.random.default_rng(0)
+_MINHASH_MUL = _rng.integers(1, 2**63, size=MINHASH_SIZE, dtype=np.uint64) | np.uint64(1)
+_MINHASH_XOR = _rng.integers(0, 2**63, size=MINHASH_SIZE, dtype=np.uint64)
+
+def minhash_signature(text: str, shingle_size: int = 3) -> np.ndarray:
+    """
+    Computes the MinHash signature of a text over its word shingles.
+
+    Args:
+        text (str): The text to sign.
+        shingle_size (int): The number of consecutive words of a shingle. Defaults to 3.
+
+    Returns:
+        np.ndarray: The signature, an array of MINHASH_SIZE unsigned integers.
+    """
+    words = text.lower().split()
+    shingles = {tuple(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))}
+    hashes = np.array([hash(shingle) for shingle in shingles], dtype=np.int64).view(np.uint64)
+    # Each hash function is a xor-multiply of the shingle hashes, wrapping around 2**64
+    return ((hashes[:, None] ^ _MINHASH_XOR) * _MINHASH_MUL).min(axis=0)
+
+def signature_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Estimates the Jaccard similarity of two texts from their MinHash signatures.
+
+    Args:
+        a (np.ndarray): The signature of the first text.
+        b (np.ndarray): The signature of the second text.
+
+    Returns:
+        float: The estimated similarity, between 0 and 1.
+    """
+    return float(np.count_nonzero(a == b)) / MINHASH_SIZE
+
+class ReplyCache:
+    def __init__(self, max_size: int = 1024):
+        """
+        Initializes the ReplyCache instance.
+
+        Args:
+            max_size (int): The maximum number of replies kept in the cache. Defaults to 1024.
+        """
+        self.max_size = max_size
+        self._replies: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(neuron_id: str, conversation: List[Dict[str, Any]], context: Dict[str, Message], args: Any = None) -> bytes:
+        """
+        Computes the cache key of a fire.
+
+        Args:
+            neuron_id (str): The ID of the neuron firing.
+            conversation (List[Dict[str, Any]]): The conversation of the brain run.
+            context (Dict[str, Message]): The buffered messages the neuron fires on.
+            args (Any): The arguments of the step of the neuron, so that a reconfigured step does not reuse stale replies. Defaults to None.
+
+        Returns:
+            bytes: A digest of the inputs of the fire.
+        """
+        # The context is identified by the content hashes of its messages, so that replies are not serialized again
+        # and a key covers the whole subgraph that produced the context when its messages come from cacheable neurons
+        digest = hashlib.blake2b(dumps([neuron_id, args, conversation]), digest_size=16)
+        for predecessor in sorted(context):
+            digest.update(predecessor.encode())
+            digest.update(context[predecessor].digest())
+        return digest.digest()
+
+    def get(self, key: bytes) -> Reply:
+        """
+        Gets a cached reply.
+
+        Args:
+            key (bytes): The key of the fire.
+
+        Returns:
+            Reply: The cached reply, or None on a miss.
+        """
+        with self._lock:
+            reply = self._replies.get(key)
+            if reply is not None:
+                self._replies.move_to_end(key)
+            return reply
+
+    def put(self, key: bytes, reply: Reply):
+        """
+        Stores a reply, evicting the least recently used replies beyond max_size.
+
+        Args:
+            key (bytes): The key of the fire.
+            reply (Reply): The reply to store.
+        """
+        with self._lock:
+            self._replies[key] = reply
+            self._replies.move_to_end(key)
+            while len(self._replies) > self.max_size:
+                self._replies.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes every reply from the cache.
+        """
+        with self._lock:
+            self._replies.clear()
+
+    def __len__(self):
+        return len(self._replies)
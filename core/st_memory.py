@@ -1,44 +1,194 @@
 from core.message import Message
 from typing import Dict, Any, List
+import numpy as np
+import bisect
+import heapq
+
+# Message attributes stored as columns, so that filtering on them is vectorized
+_INDEXED_ATTRIBUTES = ('sender_id', 'receiver_id', 'type', 'priority')
 
 class WorkingMemory:
     def __init__(self, max_working_memory_size: int = int(1e5), working_memory_overflow_strategy: str = 'fifo'):
         """
         Initializes a WorkingMemory instance.
 
+        Messages are kept in a min-heap ordered by priority (desc) and then by creation time (asc),
+        so that appending a message costs O(log N) instead of a full sort. With the 'lifo' strategy the heap
+        is kept fully sorted instead, so that the last messages can be trimmed without sorting it again.
+
         Args:
             max_working_memory_size (int): The maximum size of the working memory. Defaults to 1e5.
             working_memory_overflow_strategy (str): The strategy to use when the working memory overflows. Defaults to 'fifo'.
         """
         self.working_memory_size = 0
         self.max_working_memory_size = max_working_memory_size
+        # Heap of (-priority, created_at, row, message), the row breaks ties without comparing messages
+        self._heap = []
         self.working_memory_overflow_strategy = working_memory_overflow_strategy
-        self.messages = []
+        # Sorted messages, computed on demand and invalidated when the heap changes
+        self._sorted = None
+        # Rows of the messages in insertion order, with a column per indexed attribute and an alive flag cleared on eviction
+        self._rows: List[Message] = []
+        self._alive = np.zeros(16, dtype=bool)
+        self._columns = {attr: np.empty(16, dtype=object) for attr in _INDEXED_ATTRIBUTES}
+        self._evicted = 0
+
+    @property
+    def messages(self) -> List[Message]:
+        """
+        Gets the messages of the working memory.
+
+        Returns:
+            List[Message]: The messages sorted by priority (desc) and then by creation time (asc).
+        """
+        return self.sorted_view
+
+    @property
+    def sorted_view(self) -> List[Message]:
+        """
+        Gets the messages sorted by priority (desc) and then by creation time (asc), cached until the next change.
+
+        Returns:
+            List[Message]: The sorted messages.
+        """
+        if self._sorted is None:
+            self._sorted = [entry[-1] for entry in sorted(self._heap)]
+        return self._sorted
+
+    def _push(self, message: Message):
+        """
+        Pushes a message on the heap and appends its row to the columns.
+
+        Args:
+            message (Message): The message to push.
+        """
+        row = len(self._rows)
+        if row == len(self._alive):
+            # Double the capacity of the columns
+            self._alive = np.concatenate([self._alive, np.zeros(row, dtype=bool)])
+            for attr, column in self._columns.items():
+                self._columns[attr] = np.concatenate([column, np.empty(row, dtype=object)])
+        self._rows.append(message)
+        self._alive[row] = True
+        for attr, column in self._columns.items():
+            column[row] = getattr(message, attr)
+        self._insert(self._heap, (-message.priority, message.created_at, row, message))
+
+    def _evict(self, rows: List[int]):
+        """
+        Marks the rows of messages removed from the heap as dead, compacting the columns once half of the rows are dead.
+
+        Args:
+            rows (List[int]): The rows of the removed messages.
+        """
+        for row in rows:
+            self._rows[row] = None
+        self._alive[rows] = False
+        self._evicted += len(rows)
+        # Compacting renumbers the rows, so it only happens once the whole batch is marked
+        if self._evicted > len(self._rows) // 2:
+            self._compact()
+
+    def _compact(self):
+        """
+        Drops the dead rows and renumbers the remaining ones, preserving their order.
+        """
+        n = len(self._rows)
+        live = np.flatnonzero(self._alive[:n])
+        renumber = np.empty(n, dtype=np.int64)
+        renumber[live] = np.arange(len(live))
+        capacity = max(16, 2 * len(live))
+        self._rows = [self._rows[i] for i in live]
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:len(live)] = True
+        for attr, column in self._columns.items():
+            compacted = np.empty(capacity, dtype=object)
+            compacted[:len(live)] = column[live]
+            self._columns[attr] = compacted
+        # Renumbering keeps the relative order of rows, so the heap stays valid
+        self._heap = [(priority, created_at, int(renumber[row]), message) for priority, created_at, row, message in self._heap]
+        self._evicted = 0
+
+    @property
+    def working_memory_overflow_strategy(self) -> str:
+        """
+        Gets the strategy used when the working memory overflows.
+
+        Returns:
+            str: The overflow strategy, 'fifo' or 'lifo'.
+        """
+        return self._working_memory_overflow_strategy
+
+    @working_memory_overflow_strategy.setter
+    def working_memory_overflow_strategy(self, value: str):
+        """
+        Sets the overflow strategy, binding its trim method once instead of comparing strings on every append.
+
+        Args:
+            value (str): The overflow strategy, 'fifo' or 'lifo'. Any other value disables trimming.
+        """
+        self._working_memory_overflow_strategy = value
+        self._trim = {"fifo": self._trim_fifo, "lifo": self._trim_lifo}.get(value)
+        if value == "lifo":
+            # A sorted list is a valid heap, keeping it sorted makes the last messages removable in place
+            self._heap.sort()
+            self._insert = bisect.insort
+        else:
+            self._insert = heapq.heappush
+
+    def _trim_fifo(self, overflow_count: int):
+        """
+        Removes the first messages in sorted order.
+
+        Args:
+            overflow_count (int): The number of messages to remove.
+        """
+        self._evict([heapq.heappop(self._heap)[2] for _ in range(overflow_count)])
+
+    def _trim_lifo(self, overflow_count: int):
+        """
+        Removes the last messages in sorted order, in place.
+
+        Args:
+            overflow_count (int): The number of messages to remove.
+        """
+        # The heap is kept sorted for this strategy, so the last messages are at its tail
+        rows = [entry[2] for entry in self._heap[-overflow_count:]]
+        del self._heap[-overflow_count:]
+        self._evict(rows)
 
     def overflow(self):
         """
         Handles working memory overflow by implementing the chosen strategy.
         """
-        if self.working_memory_size > self.max_working_memory_size:
-            if self.working_memory_overflow_strategy == "fifo":
-                # Remove oldest messages
-                self.messages = self.messages[-self.max_working_memory_size:]
-            elif self.working_memory_overflow_strategy == "lifo":
-                # Remove newest messages
-                self.messages = self.messages[:self.max_working_memory_size]
-            self.working_memory_size = self.max_working_memory_size
+        overflow_count = self.working_memory_size - self.max_working_memory_size
+        if overflow_count > 0 and self._trim is not None:
+            self._trim(overflow_count)
+            self.working_memory_size = len(self._heap)
 
     def append(self, message: Message):
         """
-        Appends a message to the working memory and sorts the working memory by priority and creation time.
+        Appends a message to the working memory, keeping it ordered by priority and creation time.
 
         Args:
             message (Message): The message to append.
         """
-        self.messages.append(message)
-        # Sort by priority (desc) and then by creation time (asc)
-        self.messages.sort(key=lambda x: (-x.priority, x.created_at))
-        self.working_memory_size = len(self.messages)
+        self._push(message)
+        self._sorted = None
+        self.working_memory_size = len(self._heap)
+        self.overflow()
+
+    def extend(self, messages: List[Message]):
+        """
+        Appends several messages to the working memory, handling overflow once for the whole batch.
+
+        Args:
+            messages (List[Message]): The messages to append.
+        """
+        for message in messages:
+            self._push(message)
+        self._sorted = None
+        self.working_memory_size = len(self._heap)
         self.overflow()
 
     def get_messages_by_filter(self, filter_criteria: Dict[str, Any]) -> List[Message]:
@@ -49,15 +199,24 @@ class WorkingMemory:
             filter_criteria (Dict[str, Any]): A dictionary of attribute names and values to filter messages by.
 
         Returns:
-            List[Message]: A list of messages that match the filter criteria.
+            List[Message]: A list of messages that match the filter criteria, in no particular order.
         """
+        n = len(self._rows)
+        mask = self._alive[:n].copy()
+        # Indexed attributes compared to a scalar are filtered on their column, the others message by message
+        remaining = {}
+        for attr, value in filter_criteria.items():
+            column = self._columns.get(attr)
+            if column is None or isinstance(value, (list, tuple, set, dict, np.ndarray)):
+                remaining[attr] = value
+            else:
+                # The value is wrapped in an object scalar, otherwise NumPy converts str subclasses such as
+                # MessageType with str() and compares the columns to 'MessageType.PAYLOAD'
+                mask &= column[:n] == np.array(value, dtype=object)
+
         filtered_messages = []
-        for message in self.messages:
-            match = True
-            for attr, value in filter_criteria.items():
-                if getattr(message, attr, None) != value:
-                    match = False
-                    break
-            if match:
+        for row in np.flatnonzero(mask):
+            message = self._rows[row]
+            if all(getattr(message, attr, None) == value for attr, value in remaining.items()):
                 filtered_messages.append(message)
-        return filtered_messages
\ No newline at end of file
+        return filtered_messages
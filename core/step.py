@@ -3,13 +3,14 @@
 # A step represents a single unit of processing in a conversation, 
 # and is responsible for generating a reply based on the conversation context and inputs.
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 from core.message import Message, Reply
 from core.st_memory import WorkingMemory
 
 class Step(ABC):
-    def __init__(self, str_input: str = None, step_args: Dict[str, Any] = {}):
+    def __init__(self, str_input: str = None, step_args: Dict[str, Any] = None):
         """
         Initializes a Step instance.
 
@@ -18,7 +19,7 @@ class Step(ABC):
             step_args (Dict[str, Any]): Additional arguments for the step.
         """
         self.str_input = str_input
-        self.step_args = step_args
+        self.step_args = step_args if step_args is not None else {}
 
     @abstractmethod
     def forward(self, conversation: Dict[str, Any], context: Dict[str, Message], working_memory: WorkingMemory = None) -> Reply:
@@ -26,11 +27,27 @@ class Step(ABC):
         Processes the conversation context and inputs to generate a reply.
 
         Args:
-            conversation (Dict[str, Any]): The conversation data.
-            context (Dict[str, Message]): The conversation context.
+            conversation (Dict[str, Any]): The conversation data, shared by every step of a brain run so it must be copied before being modified.
+            context (Dict[str, Message]): The conversation context. The messages are the buffered ones, not copies, and are shared with the working memory.
             working_memory (WorkingMemory): The working memory for the conversation.
 
         Returns:
             Reply: The generated reply.
         """
-        pass
\ No newline at end of file
+        pass
+
+    async def aforward(self, conversation: Dict[str, Any], context: Dict[str, Message], working_memory: WorkingMemory = None) -> Reply:
+        """
+        Asynchronous version of forward. By default it runs forward in a worker thread,
+        steps waiting on I/O such as an LLM API call should override it with a non-blocking implementation
+        so that the brain can overlap their fires on its event loop.
+
+        Args:
+            conversation (Dict[str, Any]): The conversation data, shared by every step of a brain run so it must be copied before being modified.
+            context (Dict[str, Message]): The conversation context. The messages are the buffered ones, not copies, and are shared with the working memory.
+            working_memory (WorkingMemory): The working memory for the conversation.
+
+        Returns:
+            Reply: The generated reply.
+        """
+        return await asyncio.to_thread(self.forward, conversation, context, working_memory)
@@ -12,19 +12,23 @@ class Trigger(ABC):
     Abstract base class for triggers in the neural network.
     
     Attributes:
-        None
+        cacheable (bool): Whether the condition only depends on the neuron buffer, in which case
+            the neuron reuses its result until the buffer changes. Defaults to False.
     
     Methods:
         condition: Evaluates the trigger condition for a given neuron.
     """
+    cacheable: bool = False
+
     @abstractmethod
-    def condition(self, neuron: Neuron) -> list|None:
+    def condition(self, neuron: Neuron) -> tuple|list|None:
         """Evaluates the trigger condition for a given neuron.
 
         Args:
             neuron (Neuron): The neuron to evaluate the condition for.
         
         Returns:
-            list|None: A subset of the neuron predecessors if triggered, else None.
+            tuple|list|None: A sequence of IDs of a subset of the neuron predecessors if triggered, else None.
+                A tuple such as neuron.buffer.predecessors_ids can be returned as is.
         """
         pass
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Checks the WorkingMemory against a reference implementation that keeps a fully sorted list,
+the way the working memory was originally implemented.
+"""
+
+from typing import Any, Dict, List
+from core.message import Message, MessageType
+from core.st_memory import WorkingMemory
+import random
+import unittest
+
+class SortedListMemory:
+    """Reference working memory, re-sorting a list of messages on every append."""
+
+    def __init__(self, max_working_memory_size: int, working_memory_overflow_strategy: str):
+        self.max_working_memory_size = max_working_memory_size
+        self.working_memory_overflow_strategy = working_memory_overflow_strategy
+        self.messages: List[Message] = []
+
+    def append(self, message: Message):
+        self.messages.append(message)
+        # Sort by priority (desc) and then by creation time (asc), ties keep their insertion order
+        self.messages.sort(key=lambda x: (-x.priority, x.created_at))
+        if len(self.messages) > self.max_working_memory_size:
+            if self.working_memory_overflow_strategy == "fifo":
+                self.messages = self.messages[-self.max_working_memory_size:]
+            elif self.working_memory_overflow_strategy == "lifo":
+                self.messages = self.messages[:self.max_working_memory_size]
+
+    def get_messages_by_filter(self, filter_criteria: Dict[str, Any]) -> List[Message]:
+        return [
+            message for message in self.messages
+            if all(getattr(message, attr, None) == value for attr, value in filter_criteria.items())
+        ]
+
+class TestWorkingMemory(unittest.TestCase):
+    def random_batch(self, rng: random.Random, size: int) -> List[Message]:
+        return [
+            Message(
+                type=rng.choice([MessageType.PAYLOAD, MessageType.PERSISTENT]),
+                sender_id=str(rng.randint(0, 3)),
+                receiver_id=str(rng.randint(0, 3)),
+                priority=rng.randint(0, 4),
+                # Coarse creation times, so that ties are broken by insertion order
+                created_at=float(rng.randint(0, 50)),
+            )
+            for _ in range(size)
+        ]
+
+    def assert_same(self, memory: WorkingMemory, reference: SortedListMemory):
+        self.assertEqual([id(message) for message in memory.messages], [id(message) for message in reference.messages])
+        for criteria in ({'sender_id': '1'}, {'sender_id': '2', 'priority': 3}, {'type': MessageType.PERSISTENT}, {'reply': None}):
+            self.assertCountEqual(
+                [id(message) for message in memory.get_messages_by_filter(criteria)],
+                [id(message) for message in reference.get_messages_by_filter(criteria)],
+            )
+
+    def test_overflow_matches_sorted_list(self):
+        for strategy in ("fifo", "lifo"):
+            with self.subTest(strategy=strategy):
+                rng = random.Random(strategy)
+                memory = WorkingMemory(max_working_memory_size=10, working_memory_overflow_strategy=strategy)
+                reference = SortedListMemory(10, strategy)
+                for round in range(40):
+                    # Batches larger than the memory compact its rows while they are evicted
+                    batch = self.random_batch(rng, rng.randint(1, 300))
+                    if round % 2:
+                        memory.extend(batch)
+                    else:
+                        for message in batch:
+                            memory.append(message)
+                    for message in batch:
+                        reference.append(message)
+                    self.assert_same(memory, reference)
+
+    def test_overflow_strategy_change(self):
+        rng = random.Random(0)
+        memory = WorkingMemory(max_working_memory_size=20, working_memory_overflow_strategy="fifo")
+        reference = SortedListMemory(20, "fifo")
+        for strategy in ("lifo", "fifo", "lifo"):
+            memory.working_memory_overflow_strategy = strategy
+            reference.working_memory_overflow_strategy = strategy
+            for message in self.random_batch(rng, 100):
+                memory.append(message)
+                reference.append(message)
+            self.assert_same(memory, reference)
+
+if __name__ == "__main__":
+    unittest.main()